@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+
+import math
+import os
+import random
+import subprocess
+import sys
+import timeit
+
+from smooth import (
+    Point, Segment, Smoother, root_mean_square, waringo_henrich_smooth,
+)
+
+
+def random_track(n, seed=0):
+    """
+    Returns a random walk of `n` points with a slowly drifting heading.
+    """
+    rand = random.Random(seed)
+    x = y = heading = 0.0
+    points = []
+    for _ in range(n):
+        points.append(Point(x, y))
+        heading += rand.gauss(0, 0.3)
+        step = rand.uniform(0.5, 2.0)
+        x += step * math.cos(heading)
+        y += step * math.sin(heading)
+    return points
+
+
+def deviations(points, smoothed):
+    """
+    Returns the distances of every original point in `points` from the line of
+    the output segment in `smoothed` spanning it.
+    """
+    indices = dict((p, i) for i, p in enumerate(points))
+    ds = []
+    for start, end in zip(smoothed, smoothed[1:]):
+        segment = Segment(start, end)
+        ds.extend(segment.distances(points[indices[start] + 1:indices[end]]))
+    return ds
+
+
+def bench_approximate(sizes=(500, 5000, 20000), d_lims=(1.0, 2.0), repeat=3):
+    """
+    Compares the run time and quality of the exact and approximate modes.
+    """
+    print('exact vs. approximate')
+    print('{0:>6} {1:>6} {2:>12} {3:>8} {4:>8} {5:>8} {6:>8}'.format(
+        'n', 'd_lim', 'mode', 'seconds', 'points', 'max', 'rms',
+    ))
+
+    for n in sizes:
+        points = random_track(n)
+        for d_lim in d_lims:
+            for approximate in (False, True):
+                seconds = min(timeit.repeat(
+                    lambda: waringo_henrich_smooth(points, d_lim, approximate=approximate),
+                    number=1,
+                    repeat=repeat,
+                ))
+                smoothed = waringo_henrich_smooth(points, d_lim, approximate=approximate)
+                ds = deviations(points, smoothed)
+                print('{0:>6} {1:>6} {2:>12} {3:>8.4f} {4:>8} {5:>8.3f} {6:>8.3f}'.format(
+                    n,
+                    d_lim,
+                    'approximate' if approximate else 'exact',
+                    seconds,
+                    len(smoothed),
+                    max(ds) if ds else 0.0,
+                    root_mean_square(ds) or 0.0,
+                ))
+
+
+def bench_resmooth(n=5000, d_lims=(2.0, 2.1, 1.9, 3.0, 1.0), repeat=3):
+    """
+    Compares smoothing from scratch with re-smoothing a `Smoother` as the
+    deviation limit changes.
+    """
+    points = random_track(n)
+    smoother = Smoother(points)
+    smoother.smooth(d_lims[0])
+
+    print('re-smoothing, n={0}'.format(n))
+    print('{0:>6} {1:>12} {2:>12}'.format('d_lim', 'scratch', 'smoother'))
+
+    previous = d_lims[0]
+    for d_lim in d_lims[1:]:
+        scratch = min(timeit.repeat(
+            lambda: waringo_henrich_smooth(points, d_lim),
+            number=1,
+            repeat=repeat,
+        ))
+
+        seconds = []
+        for _ in range(repeat):
+            smoother.smooth(previous)
+            start = timeit.default_timer()
+            smoother.smooth(d_lim)
+            seconds.append(timeit.default_timer() - start)
+
+        print('{0:>6} {1:>12.4f} {2:>12.4f}'.format(d_lim, scratch, min(seconds)))
+        previous = d_lim
+
+
+def bench_extend(n=5000, chunk=10, d_lim=2.0):
+    """
+    Compares smoothing a growing path from scratch after every appended chunk
+    of points with extending a `Smoother`.
+    """
+    points = random_track(n)
+
+    start = timeit.default_timer()
+    for i in range(chunk, n + 1, chunk * 50):
+        waringo_henrich_smooth(points[:i], d_lim)
+    scratch = (timeit.default_timer() - start) * 50
+
+    start = timeit.default_timer()
+    smoother = Smoother([])
+    for i in range(0, n, chunk):
+        smoother.extend(points[i:i + chunk])
+        smoothed = smoother.smooth(d_lim)
+    seconds = timeit.default_timer() - start
+
+    print('growing path, n={0}, chunk={1}, d_lim={2}'.format(n, chunk, d_lim))
+    print('{0:>12} {1:>8.3f} (estimated from every 50th chunk)'.format('scratch', scratch))
+    print('{0:>12} {1:>8.3f} {2} points vs. {3} from scratch'.format(
+        'smoother',
+        seconds,
+        len(smoothed),
+        len(waringo_henrich_smooth(points, d_lim)),
+    ))
+
+
+COLD_START = '''
+import timeit
+start = timeit.default_timer()
+from smooth import Point, waringo_henrich_smooth
+imported = timeit.default_timer()
+waringo_henrich_smooth([Point(i, (i * 7) % 5) for i in range({n})], 1.0)
+print(imported - start, timeit.default_timer() - imported)
+'''
+
+
+def bench_cold_start(sizes=(10, 50, 200), repeat=10):
+    """
+    Measures the time taken to import the module and make the first call in a
+    fresh interpreter.
+    """
+    print('cold start')
+    print('{0:>6} {1:>12} {2:>12}'.format('n', 'import ms', 'first ms'))
+
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    for n in sizes:
+        timings = []
+        for _ in range(repeat):
+            output = subprocess.check_output(
+                [sys.executable, '-c', COLD_START.format(n=n)],
+                cwd=cwd,
+            )
+            timings.append([float(t) for t in output.split()])
+        import_seconds, first_seconds = [
+            sorted(column)[len(column) // 2] for column in zip(*timings)
+        ]
+        print('{0:>6} {1:>12.3f} {2:>12.3f}'.format(
+            n, import_seconds * 1000, first_seconds * 1000,
+        ))
+
+
+if __name__ == '__main__':
+    bench_approximate()
+    print()
+    bench_resmooth()
+    print()
+    bench_extend()
+    print()
+    bench_cold_start()
@@ -5,8 +5,8 @@ import collections
 import math
 
 from smooth import (
-    Point, point_to_point_distance, point_to_line_distance, find_neighborhood,
-    root_mean_square, root_mean_square_error, max_error,
+    Point, Segment, Smoother, point_to_point_distance, point_to_line_distance,
+    find_neighborhood, root_mean_square, root_mean_square_error, max_error,
     waringo_henrich_smooth,
 )
 
@@ -133,6 +133,34 @@ class PointToLineDistanceTest(unittest.TestCase):
         ), 1.8600, 4)
 
 
+class SegmentTestCase(unittest.TestCase):
+    def test_it_should_find_the_same_distances_as_point_to_line_distance(self):
+        lines = [
+            (Point(0, 0), Point(0, 10)),
+            (Point(0, 0), Point(10, 0)),
+            (Point(0, 0), Point(0, 0)),
+            (Point(0, 0), Point(1, 1)),
+            (Point(-10, 10), Point(-3, 5)),
+        ]
+        points = [
+            Point(0, 0),
+            Point(5, -100),
+            Point(5, 1000),
+            Point(0, 1),
+            Point(6, 1.1),
+            Point(-4, 8),
+        ]
+        for p1, p3 in lines:
+            segment = Segment(p1, p3)
+            for p2 in points:
+                self.assertEqual(segment.distance(p2), point_to_line_distance(p1, p2, p3))
+
+    def test_it_should_find_the_distances_of_many_points(self):
+        segment = Segment(Point(0, 0), Point(10, 0))
+        self.assertEqual(segment.distances([Point(1, 1), Point(2, -3), Point(3, 0)]), [1, 3, 0])
+        self.assertEqual(segment.distances([]), [])
+
+
 class FindNeighborhoodTestCase(unittest.TestCase):
     def setUp(self):
         self.coords1 = [
@@ -264,7 +292,7 @@ class MaxErrorTestCase(ErrorTestCase):
         self.assertTrue(max_error([], None, None) is None)
 
 
-class WaringoHenrichSmoothTestCase(unittest.TestCase):
+class PathTestCase(unittest.TestCase):
     def setUp(self):
         # Random line
         self.points1 = [
@@ -470,6 +498,23 @@ class WaringoHenrichSmoothTestCase(unittest.TestCase):
             Point(30, 12),
         ]
 
+    def assertWithinDeviation(self, points, smoothed, d_lim):
+        # Match each output point to its index in the original list
+        indices = []
+        i = 0
+        for p in smoothed:
+            while points[i] != p:
+                i += 1
+            indices.append(i)
+            i += 1
+
+        annotated = [AnnotatedPoint(p.x, p.y, i, False) for i, p in enumerate(points)]
+        for start, end in zip(indices, indices[1:]):
+            d = max_error(annotated, annotated[start], annotated[end])
+            self.assertTrue(d is None or d < d_lim)
+
+
+class WaringoHenrichSmoothTestCase(PathTestCase):
     def test_it_should_smooth_paths_to_within_the_specified_degree_of_error(self):
         self.assertEqual(waringo_henrich_smooth(self.points2, 1), [
             Point(-34, 134),
@@ -543,6 +588,129 @@ class WaringoHenrichSmoothTestCase(unittest.TestCase):
             Point(638, 140),
         ])
 
+    def test_it_should_smooth_paths_to_within_the_specified_degree_of_error_in_approximate_mode(self):
+        for points, d_lim in [
+            (self.points1, 30),
+            (self.points1, 60),
+            (self.points2, 1),
+            (self.points2, 1.5),
+            (self.points2, 2),
+        ]:
+            smoothed = waringo_henrich_smooth(points, d_lim, approximate=True)
+            self.assertEqual(smoothed[0], points[0])
+            self.assertEqual(smoothed[-1], points[-1])
+            self.assertTrue(len(smoothed) < len(points))
+            self.assertWithinDeviation(points, smoothed, d_lim)
+
+    def test_it_should_return_the_given_list_if_the_list_has_a_length_less_than_3_in_approximate_mode(self):
+        self.assertEqual(waringo_henrich_smooth([], 0, approximate=True), [])
+        self.assertEqual(waringo_henrich_smooth([Point(0, 0)], 0, approximate=True), [Point(0, 0)])
+        self.assertEqual(waringo_henrich_smooth([Point(0, 0), Point(1, 1)], 0, approximate=True), [Point(0, 0), Point(1, 1)])
+
+    def test_it_should_return_only_the_first_and_last_points_if_a_large_enough_error_limit_is_given_in_approximate_mode(self):
+        self.assertEqual(waringo_henrich_smooth(self.points2, 1000, approximate=True), [
+            Point(-34, 134),
+            Point(30, 12),
+        ])
+        self.assertEqual(waringo_henrich_smooth(self.points1, 1000, approximate=True), [
+            Point(0, 0),
+            Point(638, 140),
+        ])
+
+    def test_it_should_handle_repeated_points_in_approximate_mode(self):
+        points = [Point(0, 0), Point(0, 0), Point(5, 1), Point(5, 1), Point(10, 0), Point(10, 0)]
+        smoothed = waringo_henrich_smooth(points, 2, approximate=True)
+        self.assertEqual(smoothed, [Point(0, 0), Point(10, 0)])
+        smoothed = waringo_henrich_smooth(points, 0.5, approximate=True)
+        self.assertWithinDeviation(points, smoothed, 0.5)
+
+
+class SmootherTestCase(PathTestCase):
+    def test_it_should_smooth_paths_like_waringo_henrich_smooth(self):
+        smoother = Smoother(self.points2)
+        for d_lim in [1, 1.5, 2, 1000]:
+            self.assertEqual(smoother.smooth(d_lim), waringo_henrich_smooth(self.points2, d_lim))
+
+    def test_it_should_give_the_same_result_when_the_limit_is_loosened_or_tightened(self):
+        for points in [self.points1, self.points2]:
+            smoother = Smoother(points)
+            for d_lim in [2, 30, 1, 60, 1.5, 1000, 0.5, 2]:
+                self.assertEqual(smoother.smooth(d_lim), waringo_henrich_smooth(points, d_lim))
+
+    def test_it_should_limit_the_number_of_points_removed(self):
+        smoother = Smoother(self.points2)
+        for d_lim, max_steps in [(2, 10), (2, None), (2, 50), (1000, 100), (1, 20)]:
+            self.assertEqual(
+                smoother.smooth(d_lim, max_steps),
+                waringo_henrich_smooth(self.points2, d_lim, max_steps),
+            )
+
+    def test_it_should_undo_only_the_removals_above_a_tightened_limit(self):
+        smoother = Smoother(self.points2)
+        smoother.smooth(2)
+        smoothed = smoother.smooth(1.5)
+        self.assertEqual(len(smoother.history), len(self.points2) - len(smoothed))
+
+    def test_it_should_not_grow_its_heap_without_bound_when_re_smoothed(self):
+        smoother = Smoother(self.points2)
+        for _ in range(50):
+            smoother.smooth(1)
+            smoother.smooth(3)
+        self.assertTrue(len(smoother.heap) <= 2 * (len(self.points2) - len(smoother.history)))
+        self.assertEqual(smoother.smooth(1.5), waringo_henrich_smooth(self.points2, 1.5))
+
+    def test_it_should_return_the_given_list_if_the_list_has_a_length_less_than_3(self):
+        self.assertEqual(Smoother([]).smooth(0), [])
+        self.assertEqual(Smoother([Point(0, 0)]).smooth(0), [Point(0, 0)])
+        self.assertEqual(Smoother([Point(0, 0), Point(1, 1)]).smooth(0), [Point(0, 0), Point(1, 1)])
+
+    def test_it_should_smooth_paths_to_within_the_specified_degree_of_error_as_points_are_appended(self):
+        smoother = Smoother([])
+        for i in range(0, len(self.points2), 20):
+            smoother.extend(self.points2[i:i + 20])
+            smoothed = smoother.smooth(1.5)
+            self.assertEqual(smoothed[0], self.points2[0])
+            self.assertEqual(smoothed[-1], self.points2[min(i + 20, len(self.points2)) - 1])
+            self.assertWithinDeviation(self.points2[:i + 20], smoothed, 1.5)
+
+        for d_lim in [1, 2, 1.5]:
+            self.assertWithinDeviation(self.points2, smoother.smooth(d_lim), d_lim)
+
+    def test_it_should_smooth_paths_to_within_the_specified_degree_of_error_as_points_are_updated(self):
+        points = list(self.points1)
+        smoother = Smoother(points)
+        smoother.smooth(60)
+
+        moved = [Point(300, 300), Point(350, 0)]
+        points[4:6] = moved
+        smoother.update(4, moved)
+
+        for d_lim in [60, 30, 1000, 30]:
+            smoothed = smoother.smooth(d_lim)
+            self.assertWithinDeviation(points, smoothed, d_lim)
+        self.assertTrue(Point(300, 300) in smoother.smooth(60))
+
+    def test_it_should_keep_only_removed_points_in_its_history_when_points_are_updated(self):
+        smoother = Smoother(self.points2)
+        smoother.smooth(2)
+        smoother.update(50, [Point(100, 100), Point(0, 0)])
+
+        for d_lim in [None, 2, 1, 1000]:
+            if d_lim is not None:
+                smoothed = smoother.smooth(d_lim)
+                self.assertEqual(len(smoother.history), len(self.points2) - len(smoothed))
+            removed = [p for p in smoother.points if p.r]
+            self.assertEqual(sorted(p.i for p in smoother.history), [p.i for p in removed])
+            self.assertEqual(smoother.history_max, [
+                max(p.d for p in smoother.history[:k + 1])
+                for k in range(len(smoother.history))
+            ])
+
+    def test_it_should_reject_updates_outside_of_the_path(self):
+        smoother = Smoother(self.points1)
+        self.assertRaises(IndexError, smoother.update, -1, [Point(0, 0)])
+        self.assertRaises(IndexError, smoother.update, len(self.points1), [Point(0, 0)])
+
 
 if __name__ == '__main__':
     unittest.main()